@@ -5,12 +5,42 @@ Splits a bundled PDF containing multiple candidates into separate PDFs
 organized by candidate name (Lastname_Firstname format)
 """
 
+import array
+import collections
+import contextlib
+import functools
+import hashlib
+import io
+import json
 import os
 import re
+import zipfile
 import logging
+import logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from pypdf import PdfReader, PdfWriter
 
+# pypdfium2 (PDFium bindings) is optional; it is much faster than pypdf
+# for reading outlines and copying pages. Fall back to pypdf without it.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# PyMuPDF is optional; its C text extractor is much faster than pypdf's
+# when the TOC has to be read from page text. Releases before 1.24.3
+# only provide the "fitz" module name.
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,48 +52,258 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# TOC lines like "Lastname, Firstname ... 10" or "Lastname, Firstname 10"
+_TOC_RE = re.compile(r'([A-Z][a-zA-Z\-]+,\s+[A-Z][a-zA-Z\-]+)[\s.]+(\d+)')
+
+# "Lastname, Firstname [Middle]" -> (lastname, first name only)
+_NAME_COMMA_RE = re.compile(r'([^,]*?)\s*,\s*([^,\s]+)')
+
+# "Firstname [Middle] Lastname" -> (firstname, lastname)
+_NAME_SPACE_RE = re.compile(r'(\S+)(?:\s+\S+)*\s+(\S+)')
+
+# Characters not allowed in file/folder names
+_INVALID_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+
+# Output file buffer size for candidate PDFs
+_WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def _open_reader(pdf_bytes):
+    """
+    Open a PdfReader over in-memory PDF bytes
+    
+    strict=False lets pypdf tolerate minor xref/object errors instead of
+    validating every object, which is all we need for page copying.
+    """
+    return PdfReader(io.BytesIO(pdf_bytes), strict=False)
+
+
+# Input document opened once per worker process by _init_worker: a
+# pypdfium2 PdfDocument when use_pdfium is set, otherwise a pypdf PdfReader
+_worker_document = None
+_worker_reader = None
+
+# Candidates written by this worker, and how often to drop the pypdf
+# reader's cache of resolved objects so fonts/images of already-written
+# candidates do not stay resident
+_worker_writes = 0
+_CACHE_EVICT_INTERVAL = 16
+
+
+def _init_worker(pdf_bytes, use_pdfium=False, log_queue=None):
+    """
+    Open the already-read input PDF bytes once for this worker
+    
+    When log_queue is given, the worker's log records are sent to it instead
+    of the inherited file/console handlers, so only the parent's
+    QueueListener touches pdf_splitter.log.
+    """
+    global _worker_document, _worker_reader
+    if log_queue is not None:
+        logging.getLogger().handlers = [
+            logging.handlers.QueueHandler(log_queue)
+        ]
+    
+    if use_pdfium:
+        _worker_document = pdfium.PdfDocument(pdf_bytes)
+    else:
+        _worker_reader = _open_reader(pdf_bytes)
+
+
+def _save_output(save, output_path):
+    """
+    Run save(stream) against output_path
+    
+    When output_path is None the document is saved to memory and its bytes
+    are returned instead, for the parent process to add to a zip archive.
+    """
+    if output_path is None:
+        buffer = io.BytesIO()
+        save(buffer)
+        return buffer.getvalue()
+    
+    # PDF writers issue many small write() calls; a large buffer coalesces
+    # them
+    with open(output_path, 'wb', buffering=_WRITE_BUFFER_SIZE) as output_file:
+        save(output_file)
+    return output_path
+
+
+def _write_candidate(start_page, end_page, output_path=None):
+    """
+    Write pages start_page..end_page (inclusive) of the input PDF to output_path
+    
+    Runs in a worker process initialized by _init_worker.
+    
+    Returns:
+        output_path, or the PDF bytes if output_path is None
+    """
+    global _worker_writes
+    if _worker_document is not None:
+        return _write_candidate_pdfium(start_page, end_page, output_path)
+    
+    reader = _worker_reader
+
+    total_pages = len(reader.pages)
+    # Start from an empty writer and append only this candidate's range.
+    # PdfWriter(clone_from=reader) would clone the whole bundle for every
+    # candidate, and pruning pages afterwards leaves the other candidates'
+    # objects in the writer's table, where they are still written out.
+    writer = PdfWriter()
+    # Copy the whole page range in one call rather than add_page per page
+    writer.append(fileobj=reader,
+                  pages=(start_page, min(end_page + 1, total_pages)),
+                  import_outline=False)
+
+    result = _save_output(writer.write, output_path)
+
+    _worker_writes += 1
+    if _worker_writes % _CACHE_EVICT_INTERVAL == 0 and \
+            hasattr(reader, 'resolved_objects'):
+        reader.resolved_objects.clear()
+
+    return result
+
+
+def _write_candidate_pdfium(start_page, end_page, output_path):
+    """pypdfium2 variant of _write_candidate"""
+    document = _worker_document
+    page_indices = list(range(start_page,
+                              min(end_page + 1, len(document))))
+    
+    writer = pdfium.PdfDocument.new()
+    try:
+        # An empty index list would make PDFium import every page
+        if page_indices:
+            writer.import_pages(document, pages=page_indices)
+        return _save_output(writer.save, output_path)
+    finally:
+        writer.close()
+
+
+def _file_sha256(path):
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_WRITE_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize_filename(filename):
+    """Remove invalid characters from filename (memoized)"""
+    return _INVALID_CHARS_RE.sub('_', filename).strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_candidate_name(name_str):
+    """Convert a candidate name to Lastname_Firstname format (memoized)"""
+    # Clean up the name
+    name_str = name_str.strip()
+    
+    # Handle "Lastname, Firstname" format, then "Firstname Lastname"
+    match = _NAME_COMMA_RE.match(name_str)
+    if match:
+        lastname, firstname = match.groups()
+    elif ',' in name_str:
+        # "Lastname," with no first name after the comma is malformed
+        raise ValueError(f"no first name after comma in {name_str!r}")
+    else:
+        match = _NAME_SPACE_RE.fullmatch(name_str)
+        if not match:
+            # Single name - use as is
+            return _sanitize_filename(name_str)
+        firstname, lastname = match.groups()
+    
+    return _sanitize_filename(f"{lastname}_{firstname}")
+
 
 class CandidatePDFSplitter:
     """Split a bundled candidate PDF into individual PDFs per candidate"""
     
-    def __init__(self, input_pdf_path, output_base_dir='candidates'):
+    def __init__(self, input_pdf_path, output_base_dir='candidates',
+                 log_queue=None, zip_output=False):
         """
         Initialize the splitter
         
         Args:
             input_pdf_path: Path to the input PDF file
             output_base_dir: Base directory for output folders
+            log_queue: Optional multiprocessing queue that worker processes
+                send their log records to
+            zip_output: Write all candidate PDFs into one uncompressed
+                candidates.zip in output_base_dir instead of one folder
+                per candidate
         """
         self.input_pdf_path = Path(input_pdf_path)
         self.output_base_dir = Path(output_base_dir)
         self.output_base_dir.mkdir(parents=True, exist_ok=True)
+        self.log_queue = log_queue
+        self.zip_output = zip_output
+        self.zip_path = self.output_base_dir / 'candidates.zip'
         self.reader = None
+        self.document = None
+        self._pdf_bytes = None
+        self._sha = None
         
     def load_pdf(self):
         """Load the PDF file"""
         try:
-            logger.info(f"Loading PDF: {self.input_pdf_path}")
-            self.reader = PdfReader(str(self.input_pdf_path))
-            logger.info(f"PDF loaded successfully. "
-                       f"Total pages: {len(self.reader.pages)}")
+            logger.info("Loading PDF: %s", self.input_pdf_path)
+            # Read the file once; workers reuse these bytes instead of
+            # re-reading the PDF from disk
+            self._pdf_bytes = self.input_pdf_path.read_bytes()
+            self.reader = _open_reader(self._pdf_bytes)
+            self._sha = hashlib.sha256(self._pdf_bytes).hexdigest()
+            logger.info("PDF loaded successfully. Total pages: %d",
+                        len(self.reader.pages))
             return True
         except Exception as e:
-            logger.error(f"Error loading PDF: {e}")
+            logger.error("Error loading PDF: %s", e)
             return False
     
+    def open_document(self):
+        """
+        Open the loaded PDF bytes with pypdfium2, if it is installed
+        
+        Only splitting uses the PDFium document, so it is opened on demand
+        rather than in load_pdf. Leaves self.document as None when
+        pypdfium2 is unavailable or cannot open the file.
+        """
+        if pdfium is None or self.document is not None:
+            return
+        try:
+            self.document = pdfium.PdfDocument(self._pdf_bytes)
+        except Exception as e:
+            logger.warning("pypdfium2 could not open PDF, using pypdf: %s", e)
+    
+    def close_document(self):
+        """Close the pypdfium2 document opened by open_document"""
+        if self.document is not None:
+            self.document.close()
+            self.document = None
+    
     def extract_toc_from_outlines(self):
         """
         Extract table of contents from PDF outlines/bookmarks
         
         Returns:
-            List of tuples: [(candidate_name, page_number), ...]
+            Parallel sequences (candidate_names, page_numbers): a list of
+            names and an array('i') of zero-based start pages
         """
-        toc_entries = []
+        if self.document is not None:
+            names, starts = self.extract_toc_from_pdfium_outlines()
+            if names:
+                return names, starts
+        
+        names = []
+        starts = array.array('i')
         
         try:
             if not self.reader.outline:
                 logger.warning("No outlines/bookmarks found in PDF")
-                return toc_entries
+                return names, starts
             
             def process_outline_item(item, level=0):
                 """Recursively process outline items"""
@@ -76,75 +316,108 @@ class CandidatePDFSplitter:
                         title = item.title if hasattr(item, 'title') \
                             else str(item)
                         
-                        # Get page number - try different methods
-                        page_obj = None
-                        if hasattr(item, 'page'):
-                            page_indirect = item.page
-                            # Resolve indirect reference
-                            page_obj = page_indirect.get_object() if \
-                                hasattr(page_indirect, 'get_object') else \
-                                page_indirect
-                        elif '/Page' in item:
-                            page_indirect = item['/Page']
-                            page_obj = page_indirect.get_object() if \
-                                hasattr(page_indirect, 'get_object') else \
-                                page_indirect
-                        
-                        if page_obj:
-                            page_num = self.reader.pages.index(page_obj)
-                            toc_entries.append((title, page_num))
-                            logger.debug(f"Found TOC entry: {title} -> "
-                                       f"Page {page_num}")
+                        # pypdf resolves the destination page itself
+                        # (None, or -1 on older releases, if not found)
+                        page_num = self.reader.get_destination_page_number(
+                            item)
+                        if page_num is not None and page_num >= 0:
+                            names.append(title)
+                            starts.append(page_num)
+                            logger.debug("Found TOC entry: %s -> Page %s",
+                                         title, page_num)
                     except Exception as e:
-                        logger.warning(f"Error processing outline item: "
-                                     f"{e}")
+                        logger.warning("Error processing outline item: %s",
+                                       e)
             
             # Process all outline items
             for item in self.reader.outline:
                 process_outline_item(item)
             
-            logger.info(f"Extracted {len(toc_entries)} entries from TOC")
+            logger.info("Extracted %d entries from TOC", len(names))
             
         except Exception as e:
-            logger.error(f"Error extracting TOC from outlines: {e}")
+            logger.error("Error extracting TOC from outlines: %s", e)
             import traceback
             logger.error(traceback.format_exc())
         
-        return toc_entries
+        return names, starts
+    
+    def extract_toc_from_pdfium_outlines(self):
+        """
+        Extract table of contents from bookmarks using pypdfium2
+        
+        Bookmarks whose destination PDFium cannot resolve directly (e.g.
+        GoTo actions) are skipped; the caller falls back to pypdf when
+        nothing is found.
+        
+        Returns:
+            Parallel sequences (candidate_names, page_numbers): a list of
+            names and an array('i') of zero-based start pages
+        """
+        names = []
+        starts = array.array('i')
+        
+        try:
+            # get_toc() walks nested bookmarks itself
+            for bookmark in self.document.get_toc():
+                dest = bookmark.get_dest()
+                page_num = dest.get_index() if dest is not None else None
+                if page_num is not None:
+                    title = bookmark.get_title()
+                    names.append(title)
+                    starts.append(page_num)
+                    logger.debug("Found TOC entry: %s -> Page %s",
+                                 title, page_num)
+            
+            # Stay quiet when nothing was found; the pypdf fallback reports
+            # missing outlines itself
+            if names:
+                logger.info("Extracted %d entries from TOC", len(names))
+            
+        except Exception as e:
+            logger.error("Error extracting TOC with pypdfium2: %s", e)
+        
+        return names, starts
     
     def extract_toc_from_text(self):
         """
         Extract table of contents by searching for TOC patterns in first pages
         
         Returns:
-            List of tuples: [(candidate_name, page_number), ...]
+            Parallel sequences (candidate_names, page_numbers): a list of
+            names and an array('i') of zero-based start pages
         """
-        toc_entries = []
+        names = []
+        starts = array.array('i')
         
         try:
             # Search first 5 pages for TOC
             max_pages_to_search = min(5, len(self.reader.pages))
             
-            for page_idx in range(max_pages_to_search):
-                page = self.reader.pages[page_idx]
-                text = page.extract_text()
-                
-                # Look for patterns like:
-                # "Name, Firstname ... 10" or "Lastname, Firstname 10"
-                # Common TOC patterns with dots or spaces followed by page num
-                pattern = r'([A-Z][a-zA-Z\-]+,\s+[A-Z][a-zA-Z\-]+)[\s.]+(\d+)'
-                
-                matches = re.findall(pattern, text)
+            if fitz is not None:
+                with fitz.open(stream=self._pdf_bytes,
+                               filetype='pdf') as doc:
+                    texts = [doc.load_page(page_idx).get_text('text')
+                             for page_idx in range(max_pages_to_search)]
+            else:
+                texts = [self.reader.pages[page_idx].extract_text()
+                         for page_idx in range(max_pages_to_search)]
+            
+            # Match page by page so entries never span a page break
+            for text in texts:
+                matches = _TOC_RE.findall(text)
                 for name, page_num in matches:
-                    toc_entries.append((name.strip(), int(page_num) - 1))
-                    logger.debug(f"Found TOC entry: {name} -> Page {page_num}")
+                    names.append(name.strip())
+                    starts.append(int(page_num) - 1)
+                    logger.debug("Found TOC entry: %s -> Page %s",
+                                 name, page_num)
             
-            logger.info(f"Extracted {len(toc_entries)} entries from text")
+            logger.info("Extracted %d entries from text", len(names))
             
         except Exception as e:
-            logger.error(f"Error extracting TOC from text: {e}")
+            logger.error("Error extracting TOC from text: %s", e)
         
-        return toc_entries
+        return names, starts
     
     def parse_candidate_name(self, name_str):
         """
@@ -156,33 +429,79 @@ class CandidatePDFSplitter:
         Returns:
             Formatted name string "Lastname_Firstname"
         """
-        # Clean up the name
-        name_str = name_str.strip()
-        
-        # Handle "Lastname, Firstname" format
-        if ',' in name_str:
-            parts = name_str.split(',')
-            lastname = parts[0].strip()
-            firstname = parts[1].strip().split()[0]  # Take first name only
-        else:
-            # Handle "Firstname Lastname" format
-            parts = name_str.split()
-            if len(parts) >= 2:
-                firstname = parts[0]
-                lastname = parts[-1]
-            else:
-                # Single name - use as is
-                return self.sanitize_filename(name_str)
-        
-        formatted = f"{lastname}_{firstname}"
-        return self.sanitize_filename(formatted)
+        return _parse_candidate_name(name_str)
     
     def sanitize_filename(self, filename):
         """Remove invalid characters from filename"""
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
-        return filename.strip()
+        return _sanitize_filename(filename)
+    
+    def _manifest_path(self):
+        """Path of the split manifest for the output directory"""
+        return self.output_base_dir / '.manifest.json'
+    
+    def load_manifest(self):
+        """
+        Load the manifest written by the previous split into this directory
+        
+        Returns:
+            Dict mapping formatted candidate name to
+            {'pages': [start_page, end_page], 'sha256': output_digest},
+            empty if there is no usable manifest or it was written for a
+            different input PDF
+        """
+        manifest_path = self._manifest_path()
+        if not manifest_path.exists():
+            return {}
+        
+        try:
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+        except Exception as e:
+            logger.warning("Ignoring unreadable manifest %s: %s",
+                           manifest_path, e)
+            return {}
+        
+        candidates = manifest.get('candidates') \
+            if isinstance(manifest, dict) else None
+        if not isinstance(candidates, dict) or \
+                not all(isinstance(entry, dict)
+                        for entry in candidates.values()):
+            logger.warning("Ignoring malformed manifest %s", manifest_path)
+            return {}
+        
+        if manifest.get('sha256') != self._sha:
+            logger.info("Input PDF changed since last run, "
+                        "re-splitting all candidates")
+            return {}
+        return candidates
+    
+    def save_manifest(self, candidates):
+        """
+        Record the outputs written for the loaded input PDF
+        
+        Replaces any manifest left by an earlier split into this directory.
+        
+        Args:
+            candidates: Dict mapping formatted candidate name to
+                {'pages': [start_page, end_page], 'sha256': output_digest}
+        """
+        manifest_path = self._manifest_path()
+        # Drop per-input manifests written by earlier versions
+        for stale_path in self.output_base_dir.glob('.manifest-*.json'):
+            try:
+                stale_path.unlink()
+            except OSError as e:
+                logger.warning("Could not remove old manifest %s: %s",
+                               stale_path, e)
+        try:
+            with open(manifest_path, 'w') as manifest_file:
+                json.dump({'input': str(self.input_pdf_path),
+                           'sha256': self._sha,
+                           'candidates': candidates},
+                          manifest_file, indent=2)
+        except Exception as e:
+            logger.warning("Could not write manifest %s: %s",
+                           manifest_path, e)
     
     def split_pdf(self):
         """Main method to split the PDF by candidates"""
@@ -190,92 +509,225 @@ class CandidatePDFSplitter:
             if not self.load_pdf():
                 return
         
+        self.open_document()
+        try:
+            self._split_candidates()
+        finally:
+            self.close_document()
+    
+    def _split_candidates(self):
+        """Extract the TOC and write one PDF per candidate"""
         # Try to extract TOC from outlines first
-        toc_entries = self.extract_toc_from_outlines()
+        names, starts = self.extract_toc_from_outlines()
         
         # If no outlines, try extracting from text
-        if not toc_entries:
+        if not names:
             logger.info("No outlines found, trying text extraction...")
-            toc_entries = self.extract_toc_from_text()
+            names, starts = self.extract_toc_from_text()
         
-        if not toc_entries:
+        if not names:
             logger.error("Could not extract table of contents. "
                         "Manual parsing may be required.")
             return
         
         # Sort TOC entries by page number
-        toc_entries.sort(key=lambda x: x[1])
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        names = [names[i] for i in order]
+        starts = array.array('i', [starts[i] for i in order])
         
-        logger.info(f"Processing {len(toc_entries)} candidates...")
+        logger.info("Processing %d candidates...", len(names))
         
-        # Process each candidate
-        for i, (candidate_name, start_page) in enumerate(toc_entries):
+        total_pages = len(self.reader.pages)
+        
+        # Each candidate ends the page before the next one starts; the last
+        # candidate goes to the end of the document
+        ends = [start - 1 for start in starts[1:]]
+        ends.append(total_pages - 1)
+        
+        # Candidates already split from this exact input can be skipped.
+        # The zip archive is rewritten as a whole, so nothing is skipped
+        # there.
+        previous = {} if self.zip_output else self.load_manifest()
+        written = {}
+        
+        # Build one write task per candidate
+        tasks = []
+        used_names = set()
+        for candidate_name, start_page, end_page in zip(names, starts, ends):
             try:
-                # Determine end page
-                if i + 1 < len(toc_entries):
-                    end_page = toc_entries[i + 1][1] - 1
-                else:
-                    # Last candidate goes to end of document
-                    end_page = len(self.reader.pages) - 1
-                
                 # Parse and format name
                 formatted_name = self.parse_candidate_name(candidate_name)
                 
-                logger.info(f"Processing {formatted_name}: "
-                           f"pages {start_page + 1}-{end_page + 1}")
+                # Several TOC entries can map to the same name (a repeated
+                # candidate, or per-candidate sub-bookmarks such as "CV").
+                # Parallel writers must never share an output path, so
+                # later ones get a _2, _3, ... suffix.
+                if formatted_name in used_names:
+                    base_name = formatted_name
+                    suffix = 2
+                    while f"{base_name}_{suffix}" in used_names:
+                        suffix += 1
+                    formatted_name = f"{base_name}_{suffix}"
+                    logger.warning("Duplicate candidate name %s, "
+                                   "writing pages %d-%d as %s",
+                                   base_name, start_page + 1, end_page + 1,
+                                   formatted_name)
+                used_names.add(formatted_name)
                 
-                # Create candidate folder
                 candidate_folder = self.output_base_dir / formatted_name
-                candidate_folder.mkdir(parents=True, exist_ok=True)
+                output_path = candidate_folder / f"{formatted_name}.pdf"
+                archive_name = f"{formatted_name}/{formatted_name}.pdf"
                 
-                # Create PDF for this candidate
-                writer = PdfWriter()
+                page_range = [start_page, end_page]
+                entry = previous.get(formatted_name)
+                # Only skip a file that is still exactly what this input
+                # produced last time
+                if not self.zip_output and entry is not None and \
+                        entry.get('pages') == page_range and \
+                        output_path.exists() and \
+                        _file_sha256(output_path) == entry.get('sha256'):
+                    logger.info("Skipping %s: unchanged since last run",
+                                formatted_name)
+                    written[formatted_name] = entry
+                    continue
                 
-                for page_num in range(start_page, end_page + 1):
-                    if page_num < len(self.reader.pages):
-                        writer.add_page(self.reader.pages[page_num])
+                logger.info("Processing %s: pages %d-%d", formatted_name,
+                            start_page + 1, end_page + 1)
                 
-                # Save the PDF
-                output_path = candidate_folder / f"{formatted_name}.pdf"
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
+                if self.zip_output:
+                    # Workers return the PDF bytes for the archive
+                    output_path = None
+                else:
+                    # Create candidate folder
+                    candidate_folder.mkdir(parents=True, exist_ok=True)
                 
-                logger.info(f"Created: {output_path}")
+                tasks.append((candidate_name, formatted_name, archive_name,
+                              start_page, end_page, output_path))
                 
             except Exception as e:
-                logger.error(f"Error processing {candidate_name}: {e}")
+                logger.error("Error processing %s: %s", candidate_name, e)
                 continue
         
+        # A manifest entry is only trustworthy if exactly one task wrote
+        # the file; names are made unique above, so this is a safeguard
+        targets = collections.Counter(task[1] for task in tasks)
+        
+        # Write candidate PDFs in parallel; page copying and stream
+        # re-encoding are CPU-bound, so use processes rather than threads
+        max_workers = min(os.cpu_count() or 1, 8)
+        # Cap submitted-but-unhandled tasks so finished PDFs (held in memory
+        # in zip mode) do not pile up in this process
+        max_in_flight = 2 * max_workers
+        
+        # In zip mode only this process writes the archive
+        if self.zip_output:
+            archive = zipfile.ZipFile(self.zip_path, 'w', zipfile.ZIP_STORED)
+        else:
+            archive = contextlib.nullcontext()
+        
+        archived = set()
+        with archive as zip_file, \
+                ProcessPoolExecutor(max_workers=max_workers,
+                                    initializer=_init_worker,
+                                    initargs=(self._pdf_bytes,
+                                              self.document is not None,
+                                              self.log_queue)
+                                    ) as executor:
+            def finish_task(candidate_name, formatted_name, archive_name,
+                            page_range, future):
+                """Log one finished write and add it to the archive"""
+                try:
+                    result = future.result()
+                    if zip_file is not None:
+                        # Member names come from the de-duplicated names
+                        # above; never let zipfile add a second member
+                        # under the same name
+                        if archive_name in archived:
+                            raise ValueError(f"duplicate archive member "
+                                             f"{archive_name}")
+                        archived.add(archive_name)
+                        with zip_file.open(archive_name, 'w',
+                                           force_zip64=True) as member:
+                            member.write(result)
+                        result = f"{self.zip_path}:{archive_name}"
+                    elif targets[formatted_name] > 1:
+                        logger.warning("Not recording %s in the manifest: "
+                                       "written by more than one entry",
+                                       result)
+                    else:
+                        written[formatted_name] = {
+                            'pages': page_range,
+                            'sha256': _file_sha256(result),
+                        }
+                    logger.info("Created: %s", result)
+                except Exception as e:
+                    logger.error("Error processing %s: %s", candidate_name, e)
+            
+            # Handle results in submission order; popping each entry drops
+            # the last reference to its future and result bytes
+            pending = collections.deque()
+            for task_idx, (candidate_name, formatted_name, archive_name,
+                           start_page, end_page, output_path) in \
+                    enumerate(tasks):
+                try:
+                    future = executor.submit(_write_candidate, start_page,
+                                             end_page, output_path)
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. killed for memory); already
+                    # submitted tasks report their own errors below
+                    logger.error("Worker pool failed, not writing: %s (%s)",
+                                 ", ".join(task[1]
+                                           for task in tasks[task_idx:]),
+                                 e)
+                    break
+                pending.append((candidate_name, formatted_name, archive_name,
+                                [start_page, end_page], future))
+                if len(pending) >= max_in_flight:
+                    finish_task(*pending.popleft())
+            while pending:
+                finish_task(*pending.popleft())
+        
+        if not self.zip_output:
+            self.save_manifest(written)
+        
         logger.info("PDF splitting completed!")
     
-    def analyze_pdf_structure(self):
+    def analyze_pdf_structure(self, include_text=False):
         """
         Analyze PDF structure to help with manual TOC extraction if needed
+        
+        Args:
+            include_text: Also show the text of the first two pages. Text
+                extraction can take seconds per page, so it is opt-in.
         """
         if not self.reader:
             if not self.load_pdf():
                 return
         
+        total_pages = len(self.reader.pages)
         logger.info("=== PDF Analysis ===")
-        logger.info(f"Total pages: {len(self.reader.pages)}")
-        logger.info(f"Has outlines: {bool(self.reader.outline)}")
+        logger.info("Total pages: %d", total_pages)
+        logger.info("Has outlines: %s", bool(self.reader.outline))
         
-        # Show first page text
-        logger.info("\n=== First Page Text (first 1000 chars) ===")
-        first_page_text = self.reader.pages[0].extract_text()
-        logger.info(first_page_text[:1000])
+        if not include_text:
+            logger.info("Page text not shown (use --analyze-text to show it)")
+            return
         
-        # Show second page text (might be TOC)
-        if len(self.reader.pages) > 1:
-            logger.info("\n=== Second Page Text (first 1000 chars) ===")
-            second_page_text = self.reader.pages[1].extract_text()
-            logger.info(second_page_text[:1000])
+        # Show first and second page text (second might be TOC)
+        for page_idx, label in enumerate(('First', 'Second')[:total_pages]):
+            logger.info("\n=== %s Page Text (first 1000 chars) ===", label)
+            try:
+                page_text = self.reader.pages[page_idx].extract_text()
+            except Exception as e:
+                logger.error("Error extracting text from page %d: %s",
+                             page_idx + 1, e)
+                continue
+            logger.info(page_text[:1000])
 
 
 def main():
     """Main entry point"""
     import sys
-    import glob
     import argparse
     
     # Set up argument parser
@@ -299,18 +751,31 @@ def main():
         action='store_true',
         help='Analyze PDF structure without splitting'
     )
+    parser.add_argument(
+        '--analyze-text',
+        action='store_true',
+        help='Like --analyze, but also show the text of the first two pages'
+    )
+    parser.add_argument(
+        '--zip',
+        action='store_true',
+        help='Write all candidate PDFs into one uncompressed candidates.zip '
+             'in the output directory instead of one folder per candidate'
+    )
     
     args = parser.parse_args()
     
     # Determine input PDF file
     if args.pdf_file:
         if not os.path.exists(args.pdf_file):
-            logger.error(f"PDF file not found: {args.pdf_file}")
+            logger.error("PDF file not found: %s", args.pdf_file)
             sys.exit(1)
         input_pdf = args.pdf_file
     else:
         # Find PDF files starting with R007
-        pdf_files = glob.glob('R007*.pdf')
+        pdf_files = [entry.name for entry in os.scandir('.')
+                     if entry.name.startswith('R007')
+                     and entry.name.endswith('.pdf') and entry.is_file()]
         
         if not pdf_files:
             logger.error("No PDF files starting with 'R007' found in current "
@@ -318,21 +783,34 @@ def main():
             sys.exit(1)
         
         if len(pdf_files) > 1:
-            logger.warning(f"Found {len(pdf_files)} PDF files. "
-                          f"Using the first: {pdf_files[0]}")
+            logger.warning("Found %d PDF files. Using the first: %s",
+                           len(pdf_files), pdf_files[0])
         
         input_pdf = pdf_files[0]
     
-    logger.info(f"Processing: {input_pdf}")
+    logger.info("Processing: %s", input_pdf)
     
-    # Create splitter instance
-    splitter = CandidatePDFSplitter(input_pdf, args.output)
+    # Workers log through a queue; one listener thread in this process
+    # writes their records to the configured file and console handlers
+    log_queue = multiprocessing.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, *logging.getLogger().handlers, respect_handler_level=True
+    )
+    listener.start()
     
-    # Analyze or split
-    if args.analyze:
-        splitter.analyze_pdf_structure()
-    else:
-        splitter.split_pdf()
+    try:
+        # Create splitter instance
+        splitter = CandidatePDFSplitter(input_pdf, args.output,
+                                        log_queue=log_queue,
+                                        zip_output=args.zip)
+        
+        # Analyze or split
+        if args.analyze or args.analyze_text:
+            splitter.analyze_pdf_structure(include_text=args.analyze_text)
+        else:
+            splitter.split_pdf()
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":